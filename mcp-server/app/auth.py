@@ -1,12 +1,22 @@
+import hmac
+from functools import lru_cache
 from typing import Dict, Callable, Any, Optional, Union
 from fastapi import Header, HTTPException, status
 from app.config import MCP_API_KEY
 
+# Pre-encoded once so the hot auth path skips repeated .encode() calls
+_MCP_API_KEY_BYTES = MCP_API_KEY.encode()
+
+@lru_cache(maxsize=64)
+def _api_key_valid(api_key: str) -> bool:
+    """Cached constant-time check; keys are low-cardinality so hits are O(1)."""
+    return hmac.compare_digest(api_key.encode(), _MCP_API_KEY_BYTES)
+
 def verify_api_key(api_key: str) -> bool:
-    """Verify API key for MCP access."""
-    return api_key == MCP_API_KEY
+    """Verify API key for MCP access (constant-time comparison)."""
+    return _api_key_valid(api_key)
 
-async def verify_mcp_api_key(mcp_api_key: Optional[str] = Header(None)) -> bool:
+def verify_mcp_api_key(mcp_api_key: Optional[str] = Header(None)) -> bool:
     """Dependency to verify MCP API key from header."""
     if not mcp_api_key:
         raise HTTPException(
@@ -20,4 +20,11 @@ JWT_SECRET_KEY= os.getenv("JWT_SECRET_KEY","your-super-secret-jwt-key-change-in-
 MCP_API_KEY= os.getenv("MCP_API_KEY", "mcp-api-key-2025-super-secure-token")
 
 # Default database path for SQLite
-DB_PATH= os.getenv("DB_PATH", "embedding.db")
\ No newline at end of file
+DB_PATH= os.getenv("DB_PATH", "embedding.db")
+
+# CORS allow-list, comma-separated origins (whitespace around commas is ok)
+ALLOWED_ORIGINS= [
+    o.strip()
+    for o in os.getenv("ALLOWED_ORIGINS", "http://localhost:3000").split(",")
+    if o.strip()
+]
\ No newline at end of file
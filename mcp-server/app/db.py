@@ -4,106 +4,250 @@
 # This module handles database connections and operations.
 
 import os
-import hashlib
+import asyncio
+import queue
 import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Optional
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerifyMismatchError
 from app.logger import get_logger
 from app.config import SQLITE_DB_CONFIG, DB_PATH
 
 # Initialize the logger
 logger = get_logger(__name__)
 
+# Argon2id with OWASP interactive parameters (m=19456 KiB, t=2, p=1)
+_PH = PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
+
+# Full schema in one script: one parse pass, one commit, one WAL flush.
+# executescript() commits any pending transaction before it runs, so the
+# BEGIN IMMEDIATE lives inside the script and is closed by init_all().
+_SCHEMA_DDL = '''
+    BEGIN IMMEDIATE;
+
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- MCP queries table - lưu trữ các truy vấn MCP
+    CREATE TABLE IF NOT EXISTS mcp_queries (
+        id TEXT PRIMARY KEY,
+        tool_name TEXT NOT NULL,
+        input_data BLOB NOT NULL,
+        output_data BLOB NOT NULL,
+        execution_time_ms INTEGER,
+        success BOOLEAN NOT NULL,
+        error_message TEXT,
+        created_date DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_mcp_queries_tool_name
+    ON mcp_queries(tool_name);
+
+    CREATE INDEX IF NOT EXISTS idx_mcp_queries_created_date
+    ON mcp_queries(created_date);
+'''
+
+# Connection pool: N reader connections + 1 dedicated writer.
+# Connections are long-lived so the file open / WAL setup cost is paid once.
+_POOL_SIZE = os.cpu_count() or 4
+_read_pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=_POOL_SIZE)
+_write_conn: Optional[sqlite3.Connection] = None
+_write_lock = threading.Lock()
+
+# Pragma tuning bundle, applied once per physical connection:
+# WAL for concurrent readers, synchronous=NORMAL to skip one fsync per
+# commit (safe under WAL), busy_timeout to ride out writer contention,
+# 20 MB page cache, in-memory temp store for sort/group scratch.
+_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA busy_timeout=5000;
+    PRAGMA cache_size=-20000;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA foreign_keys=ON;
+"""
+
+
+
 
 def get_db_connection():
     """Get database connection"""
-    conn = None
     try:
-        
-        conn = sqlite3.connect(DB_PATH)
-
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
         conn.row_factory = sqlite3.Row  # Allows access to columns by name
-
-        conn.execute("PRAGMA journal_mode=WAL")  # Use Write-Ahead Logging for better concurrency
-
-        return conn 
+        conn.executescript(_PRAGMAS)  # Applied once: connections are pooled
+        return conn
     except sqlite3.Error as e:
         logger.error(f"Database connection error: {e}")
         raise
 
-    return conn
 
-def init_database():
-    """Initialize database with users table."""
-    conn = get_db_connection()
+@contextmanager
+def get_read_conn():
+    """Borrow a reader connection from the pool (created lazily up to _POOL_SIZE)."""
     try:
-        # Create users table
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        conn = _read_pool.get_nowait()
+    except queue.Empty:
+        conn = get_db_connection()
+    try:
+        yield conn
+    finally:
+        try:
+            _read_pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+@contextmanager
+def get_write_conn():
+    """Borrow the single shared writer connection (serialized by a lock)."""
+    global _write_conn
+    with _write_lock:
+        if _write_conn is None:
+            _write_conn = sqlite3.connect(
+                DB_PATH, check_same_thread=False, isolation_level=None
             )
-        ''')
-        
-        # Create default admin user if not exists
-        admin_password = hash_password("admin123")
-        conn.execute('''
-            INSERT OR IGNORE INTO users (username, password_hash) 
-            VALUES (?, ?)
-        ''', ("admin", admin_password))
-        
-        conn.commit()
+            _write_conn.row_factory = sqlite3.Row
+            _write_conn.executescript(_PRAGMAS)
+        yield _write_conn
+
+
+@contextmanager
+def write_tx():
+    """Run a write transaction on the shared writer connection.
+
+    Uses BEGIN IMMEDIATE to take the reserved lock up-front, avoiding the
+    deferred->reserved upgrade race that raises SQLITE_BUSY under WAL.
+    """
+    with get_write_conn() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+def init_all():
+    """Initialize the full schema and seed data in a single transaction."""
+    try:
+        with get_write_conn() as conn:
+            conn.executescript(_SCHEMA_DDL)  # leaves the BEGIN IMMEDIATE open
+            try:
+                # Create default admin user if not exists - check first so
+                # the Argon2 hash only runs on the very first boot
+                row = conn.execute(
+                    "SELECT 1 FROM users WHERE username = 'admin'"
+                ).fetchone()
+                if row is None:
+                    conn.execute('''
+                        INSERT INTO users (username, password_hash)
+                        VALUES (?, ?)
+                    ''', ("admin", hash_password("admin123")))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
         logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Error initializing database: {e}")
-        conn.rollback()
-    finally:
-        conn.close()
+        raise
 
-def mcp_db_init():
-    """Initialize the MCP database with thinking-related tables."""
-    conn = get_db_connection()
+# Audit queue: handlers enqueue mcp_queries rows without touching the
+# disk; a single background task batches them into one transaction so
+# the fsync cost is amortized across many rows.
+_AUDIT_BATCH_SIZE = 500
+_AUDIT_FLUSH_INTERVAL = 0.02  # seconds to wait for a batch to fill
+_audit_queue: "asyncio.Queue[tuple]" = asyncio.Queue(maxsize=10000)
+
+_INSERT_MCP_QUERY = '''
+    INSERT INTO mcp_queries
+        (id, tool_name, input_data, output_data, execution_time_ms, success, error_message)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def log_mcp_query(tool_name, input_data, output_data, execution_time_ms, success, error_message=None):
+    """Enqueue an mcp_queries audit row. Never blocks the request path."""
     try:
-        # Create MCP queries table - lưu trữ các truy vấn MCP
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS mcp_queries (
-                id TEXT PRIMARY KEY,
-                tool_name TEXT NOT NULL,
-                input_data TEXT NOT NULL,
-                output_data TEXT NOT NULL,
-                execution_time_ms INTEGER,
-                success BOOLEAN NOT NULL,
-                error_message TEXT,
-                created_date DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create indexes for better performance
-        conn.execute('''
-            CREATE INDEX IF NOT EXISTS idx_mcp_queries_tool_name 
-            ON mcp_queries(tool_name)
-        ''')
-        
-        conn.execute('''
-            CREATE INDEX IF NOT EXISTS idx_mcp_queries_created_date 
-            ON mcp_queries(created_date)
-        ''')
-        
-        conn.commit()
-        logger.info("MCP database tables initialized successfully")
-        
-    except Exception as e:
-        logger.error(f"Error initializing MCP database: {e}")
-        conn.rollback()
-        raise
-    finally:
-        conn.close()
+        _audit_queue.put_nowait((
+            str(uuid.uuid4()), tool_name, input_data, output_data,
+            execution_time_ms, success, error_message,
+        ))
+    except asyncio.QueueFull:
+        logger.warning("Audit queue full, dropping mcp_queries row for %s", tool_name)
+
+
+def _flush_audit_rows(rows):
+    with write_tx() as conn:
+        conn.executemany(_INSERT_MCP_QUERY, rows)
+
+
+async def audit_writer_loop():
+    """Drain the audit queue in batches inside single BEGIN IMMEDIATE transactions."""
+    global _audit_queue
+    # Recreate the queue so it binds to the current event loop; a stale
+    # queue from a previous loop (app restart in-process) would raise
+    # "bound to a different event loop" on every get/put.
+    _audit_queue = asyncio.Queue(maxsize=_audit_queue.maxsize)
+    loop = asyncio.get_running_loop()
+    while True:
+        rows = [await _audit_queue.get()]
+        try:
+            deadline = loop.time() + _AUDIT_FLUSH_INTERVAL
+            while len(rows) < _AUDIT_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    rows.append(await asyncio.wait_for(_audit_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # Don't lose rows collected before the shutdown cancel
+            _flush_audit_rows(rows)
+            raise
+        try:
+            await asyncio.to_thread(_flush_audit_rows, rows)
+        except Exception as e:
+            logger.error(f"Error flushing audit rows: {e}")
+
+
+def flush_audit_queue():
+    """Flush whatever is still queued. Called once during shutdown."""
+    rows = []
+    while True:
+        try:
+            rows.append(_audit_queue.get_nowait())
+        except asyncio.QueueEmpty:
+            break
+    if rows:
+        try:
+            _flush_audit_rows(rows)
+        except Exception as e:
+            logger.error(f"Error flushing audit rows on shutdown: {e}")
+
 
 def hash_password(password: str) -> str:
-    """Hash password using SHA256."""
-    return hashlib.sha256(password.encode()).hexdigest()
+    """Hash password using Argon2id. Returns a PHC-format string."""
+    return _PH.hash(password)
 
 
 def verify_password(password: str, password_hash: str) -> bool:
     """Verify password against hash."""
-    return hash_password(password) == password_hash
\ No newline at end of file
+    try:
+        return _PH.verify(password_hash, password)
+    except VerifyMismatchError:
+        return False
+    except InvalidHashError:
+        # Stored hash is not a PHC string (e.g. a legacy SHA-256 hex
+        # from before the Argon2 migration) - fail closed, don't crash
+        return False
\ No newline at end of file
@@ -3,9 +3,11 @@
 import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.logger import get_logger,LOGGING_CONFIG
 from app.mcp import router as mcp_router
-from app.db import init_database, mcp_db_init
+from app.config import ALLOWED_ORIGINS
+from app.db import init_all, audit_writer_loop, flush_audit_queue
 from contextlib import asynccontextmanager
 import asyncio
 
@@ -16,31 +18,44 @@ logger = get_logger(__name__)
 async def lifespan(app: FastAPI):
     """Handle startup and shutdown events."""
     # App Startup
+    audit_task = None
     try:
-        # Initialize database
-        await asyncio.to_thread(init_database)
-        await asyncio.to_thread(mcp_db_init)
-        
+        # Initialize database - one schema script, one transaction;
+        # run_in_executor skips to_thread's copy_context() overhead
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, init_all)
+
+        # Start the background audit writer
+        audit_task = asyncio.create_task(audit_writer_loop())
+
         logger.info("Initialize database")
     except Exception as e:
         logger.error(f"Failed to initialize application: {e}")
-    
+
     yield
-    
+
     # App Shutdown
     try:
+        if audit_task is not None:
+            audit_task.cancel()
+            try:
+                await audit_task
+            except asyncio.CancelledError:
+                pass
+        flush_audit_queue()
         logger.info("Application shutting down")
     except Exception as e:
         logger.error(f"Failed to shut down application: {e}")
 
-app = FastAPI(lifespan=lifespan, title="MCP Server", version="1.0.0", openapi_url="/mcp/openapi.json")
+app = FastAPI(lifespan=lifespan, title="MCP Server", version="1.0.0", openapi_url="/mcp/openapi.json", default_response_class=ORJSONResponse)
 
-# Configure CORS
+# Configure CORS: tight allow-list so browsers can cache preflights
+# and the middleware takes its fast path on non-CORS requests
 app.add_middleware( CORSMiddleware,
-    allow_origins=["*"],  # Allows all origins, adjust as needed    
-    allow_credentials=True,
-    allow_methods=["*"],  # Allows all methods, adjust as needed
-    allow_headers=["*"],  # Allows all headers, adjust as needed
+    allow_origins=ALLOWED_ORIGINS,
+    allow_methods=["GET", "POST"],
+    allow_headers=["MCP-API-Key", "Content-Type"],
+    max_age=86400,
 )
 
 # MCP Router
@@ -52,10 +67,19 @@ async def root():
 
 def main():
     """Main entry point for the FastAPI application."""
+    import sys
     import uvicorn
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host=host, port=port, log_level="debug")
+    uvicorn.run(
+        "app.main:app",
+        host=host,
+        port=port,
+        loop="uvloop" if sys.platform != "win32" else "asyncio",
+        http="httptools",
+        log_level=os.getenv("LOG_LEVEL", "info"),
+        workers=int(os.getenv("WORKERS", "1")),
+    )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
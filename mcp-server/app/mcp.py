@@ -1,8 +1,10 @@
 # mcp-server/app/mcp.py
 # This module serves as the entry point for the MCP server application.
 
+import orjson
 from app.logger import get_logger
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
+from pydantic import TypeAdapter, ValidationError
 from typing import Callable, Dict, Any, Optional, Union
 from app.json_rpc import (
     JsonRpcRequest,
@@ -14,19 +16,21 @@ from app.json_rpc import (
 )
 
 from app.auth import verify_mcp_api_key
+from app.db import log_mcp_query
 from datetime import datetime, timezone
+import time
 
 logger = get_logger(__name__)
 
 router = APIRouter()  # Bỏ dependencies auth cho MCP protocol
 
-# Registry cho các tool MCP
-TOOL_HANDLERS: Dict[str, Callable] = {}
+# Registry cho các tool MCP: name -> (handler, schema)
+TOOL_HANDLERS: Dict[str, tuple] = {}
 
-def register_tool(tool_name: str):
-    """Decorator để đăng ký tool handler"""
+def register_tool(tool_name: str, schema: Dict[str, Any]):
+    """Decorator để đăng ký tool handler kèm schema cho tools/list"""
     def decorator(func: Callable):
-        TOOL_HANDLERS[tool_name] = func
+        TOOL_HANDLERS[tool_name] = (func, schema)
         return func
     return decorator
 
@@ -35,50 +39,62 @@ async def handle_time(params: Optional[Union[dict, list]] = None) -> Dict[str, A
     """
     Time method - returns current server time in various formats
     """
-    now = datetime.now(timezone.utc)
+    # Read the clock once and derive every field from it; strftime is
+    # the slowest conversion, so format manually instead.
+    ns = time.time_ns()
+    ts = ns / 1e9
+    now = datetime.fromtimestamp(ts, timezone.utc)
     return {
         "method": "time",
         "server_time": {
             "iso_format": now.isoformat(),
-            "timestamp": now.timestamp(),
-            "unix_timestamp": int(now.timestamp()),
-            "formatted": now.strftime("%Y-%m-%d %H:%M:%S UTC"),
+            "timestamp": ts,
+            "unix_timestamp": ns // 1_000_000_000,
+            "formatted": (
+                f"{now.year:04d}-{now.month:02d}-{now.day:02d} "
+                f"{now.hour:02d}:{now.minute:02d}:{now.second:02d} UTC"
+            ),
             "timezone": "UTC"
         },
         "message": "Time retrieved successfully"
     }
 
+# Static response payloads, built once at import. Treat as frozen:
+# handlers return them directly instead of rebuilding the dicts per request.
+_INITIALIZE_RESULT: Dict[str, Any] = {
+    "protocolVersion": "2024-11-05",
+    "capabilities": {
+        "tools": {
+            "listChanged": False
+        },
+        "prompts": {
+            "listChanged": False
+        },
+        "resources": {
+            "subscribe": False,
+            "listChanged": False
+        },
+        "logging": {}
+    },
+    "serverInfo": {
+        "name": "embed-mcp",
+        "version": "1.0.0"
+    },
+    "instructions": "MCP Server initialized successfully"
+}
+
 async def handle_initialize(params: Optional[Union[dict, list]] = None) -> Dict[str, Any]:
     """
     Initialize method - MCP protocol initialization
     This is called when a client first connects to establish capabilities
     """
-    return {
-        "protocolVersion": "2024-11-05",
-        "capabilities": {
-            "tools": {
-                "listChanged": False
-            },
-            "prompts": {
-                "listChanged": False
-            },
-            "resources": {
-                "subscribe": False,
-                "listChanged": False
-            },
-            "logging": {}
-        },
-        "serverInfo": {
-            "name": "embed-mcp",
-            "version": "1.0.0"
-        },
-        "instructions": "MCP Server initialized successfully"
-    }
+    return _INITIALIZE_RESULT
 
 async def handle_notifications_initialized(params: Optional[Union[dict, list]] = None) -> Dict[str, Any]:
     """
     Handle initialized notification from client
-    This is a notification (no response expected) but we'll return empty for consistency
+    Sent without an id, handle_request answers it with HTTP 204; the ack
+    body below is only used if a client sends it as a regular request
     """
     logger.info("Client initialization completed")
     return {
@@ -87,31 +103,32 @@ async def handle_notifications_initialized(params: Optional[Union[dict, list]] =
     }
 
 @router.get("/tools/list")
+async def handle_tools_list_http() -> Response:
+    """
+    List available tools over plain HTTP - served from the byte cache
+    """
+    return Response(content=_TOOLS_LIST_BYTES, media_type="application/json")
+
 async def handle_tools_list(params: Optional[Union[dict, list]] = None) -> Dict[str, Any]:
     """
     List available tools - MCP standard method
     """
-    tools = [
-        {
-            "name": "echo",
-            "description": "Echoes back the provided message.",
-            "inputSchema": {
-                "type": "object",
-                "properties": {
-                    "message": {
-                        "type": "string",
-                        "description": "Message to echo back"
-                    }
-                },
-                "required": ["message"]
+    return _TOOLS_LIST_RESULT
+
+@register_tool("echo", schema={
+    "name": "echo",
+    "description": "Echoes back the provided message.",
+    "inputSchema": {
+        "type": "object",
+        "properties": {
+            "message": {
+                "type": "string",
+                "description": "Message to echo back"
             }
-        }
-    ]
-    
-    return {
-        "tools": tools
+        },
+        "required": ["message"]
     }
-
+})
 async def tool_echo(arguments: dict) -> dict:
     message = arguments.get("message", "")
     return {
@@ -123,8 +140,13 @@ async def tool_echo(arguments: dict) -> dict:
         ]
     }
 
-# Đăng ký trực tiếp tool handler
-TOOL_HANDLERS["echo"] = tool_echo
+# Built once from the registry after all tools are registered, so the
+# advertised list can never drift from the handlers. The HTTP route
+# serves the pre-serialized bytes.
+_TOOLS_LIST_RESULT: Dict[str, Any] = {
+    "tools": [schema for _, schema in TOOL_HANDLERS.values()]
+}
+_TOOLS_LIST_BYTES = orjson.dumps(_TOOLS_LIST_RESULT)
 
 async def handle_tools_call(params: Optional[Union[dict, list]] = None) -> Dict[str, Any]:
     """
@@ -140,46 +162,78 @@ async def handle_tools_call(params: Optional[Union[dict, list]] = None) -> Dict[
     if not tool_name:
         return {"error": "Tool name is required"}
 
-    handler = TOOL_HANDLERS.get(tool_name)
-    if not handler:
+    entry = TOOL_HANDLERS.get(tool_name)
+    if not entry:
         return {"error": f"Unknown tool: {tool_name}"}
+    handler, _ = entry
 
-    return await handler(arguments)
+    start = time.perf_counter()
+    try:
+        result = await handler(arguments)
+    except Exception as e:
+        elapsed_ms = int((time.perf_counter() - start) * 1000)
+        log_mcp_query(tool_name, orjson.dumps(arguments), orjson.dumps(None), elapsed_ms, False, str(e))
+        raise
+    elapsed_ms = int((time.perf_counter() - start) * 1000)
+    log_mcp_query(tool_name, orjson.dumps(arguments), orjson.dumps(result), elapsed_ms, True)
+    return result
+
+# O(1) method dispatch table - extend here when adding JSON-RPC methods
+_METHOD_TABLE: Dict[str, Callable] = {
+    "initialize": handle_initialize,
+    "notifications/initialized": handle_notifications_initialized,
+    "time": handle_time,
+    "tools/list": handle_tools_list,
+    "tools/call": handle_tools_call,
+}
+
+# Validates raw bytes in a single pydantic-core pass - no intermediate
+# dict from a separate json.loads step.
+_REQUEST_ADAPTER = TypeAdapter(JsonRpcRequest)
 
 @router.post("/")
-async def handle_request(request: JsonRpcRequest) -> Union[JsonRpcResponse, JsonRpcErrorResponse]:
+async def handle_request(http_request: Request) -> Union[JsonRpcResponse, JsonRpcErrorResponse]:
     """
     Handle MCP JSON-RPC requests
     """
+    try:
+        request = _REQUEST_ADAPTER.validate_json(await http_request.body())
+    except ValidationError as e:
+        if any(err["type"] == "json_invalid" for err in e.errors()):
+            return create_error_response("PARSE_ERROR", "Invalid JSON", None, None)
+        return create_error_response(
+            "INVALID_REQUEST", f"Invalid JSON-RPC request: {e}", None, None
+        )
+
     try:
         method = request.method
         params = request.params
         
-        logger.info(f"Handling MCP request: {method}")
-        
-        # Direct method routing instead of registry
-        if method == "initialize":
-            result = await handle_initialize(params)
-        elif method == "notifications/initialized":
-            result = await handle_notifications_initialized(params)
-        elif method == "time":
-            result = await handle_time(params)
-        elif method == "tools/list":
-            result = await handle_tools_list(params)
-        elif method == "tools/call":
-            result = await handle_tools_call(params)
-        else:
+        logger.info("Handling MCP request: %s", method)
+
+        # JSON-RPC notifications carry no id and expect no response body:
+        # run the side-effect and skip response construction entirely
+        if request.id is None and method.startswith("notifications/"):
+            handler = _METHOD_TABLE.get(method)
+            if handler is not None:
+                await handler(params)
+            return Response(status_code=204)
+
+        handler = _METHOD_TABLE.get(method)
+        if handler is None:
             return create_error_response(
                 "METHOD_NOT_FOUND",
                 f"Method not found: {method}",
                 request.id,
                 None
             )
-        
+
+        result = await handler(params)
+
         return create_success_response(result, request.id)
         
     except Exception as e:
-        logger.error(f"Error handling MCP request {request.method}: {e}")
+        logger.error("Error handling MCP request %s: %s", request.method, e)
         return create_error_response(
             "INTERNAL_ERROR",
             f"Internal error: {str(e)}",